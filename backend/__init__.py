@@ -0,0 +1 @@
+# Trading bot backend package.
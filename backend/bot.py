@@ -0,0 +1,903 @@
+"""Live trading engine.
+
+``run_bot_instance`` is the per-user entry point: it loads credentials,
+builds the exchange client and runs ``main`` — the trading loop that fetches
+market data, evaluates the strategy and manages the open position.
+"""
+
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import ccxt
+import numpy as np
+import pandas as pd
+
+from . import config
+from .client_manager import client_manager
+from .database import DuckDBHandler
+from .encryption import EncryptionHelper
+from .notifier import TelegramNotifier
+from .strategies.combined import CombinedStrategy
+from .strategies.filters import TrendFilter
+from .strategies.macd_strategy import MACDStrategy
+from .strategies.mean_reversion import MeanReversion
+from .strategies.rsi_strategy import RSIStrategy
+from .strategies.sma_crossover import SMACrossover
+
+# Name -> class, resolved once at import; bot start is a dict lookup
+# instead of an if/elif chain of call-time imports.
+STRATEGIES = {
+    'mean_reversion': MeanReversion,
+    'sma_crossover': SMACrossover,
+    'macd': MACDStrategy,
+    'rsi': RSIStrategy,
+    'combined': CombinedStrategy,
+}
+
+logger = logging.getLogger('TradingBot')
+
+# Trading threads log through a QueueHandler (a lock-free put); one
+# QueueListener thread owns the real file handlers and does all the
+# formatting and I/O, so bot threads never serialize on log writes.
+_log_queue = queue.SimpleQueue()
+_log_listener = None
+_log_files_installed = set()
+_log_setup_lock = threading.Lock()
+
+
+class _UserThreadFilter(logging.Filter):
+    """Keep only records emitted from the given user's bot thread.
+
+    Bot threads are named ``Bot-User-{user_id}...``, so each per-user log
+    file sees its own bot's records instead of every bot's output.
+    """
+
+    def __init__(self, user_id):
+        super().__init__()
+        # Require a boundary after the id: a plain prefix match would
+        # let user 1's file accept records from users 10, 12, 100, ...
+        self._exact = f'Bot-User-{user_id}'
+        self._prefix = f'Bot-User-{user_id}-'
+
+    def filter(self, record):
+        name = record.threadName
+        return name == self._exact or name.startswith(self._prefix)
+
+
+def _setup_bot_logging(user_id):
+    """Route bot logging through the shared queue; add the user's file.
+
+    Runs on each bot's own thread and different users start in
+    parallel, so the whole install is serialized: without the lock two
+    first-starts could both see no listener (two queue handlers, two
+    listeners splitting one queue), and the handler-tuple append is a
+    non-atomic read-modify-write that could drop a just-installed file
+    handler.
+    """
+    global _log_listener
+    with _log_setup_lock:
+        os.makedirs(config.LOG_DIR, exist_ok=True)
+        if _log_listener is None:
+            # The package owns the TradingBot hierarchy's handler
+            # topology, so it sets the level too; without this the
+            # effective level falls back to the root default (WARNING)
+            # and the status lines, per-user files and the manager's
+            # log ring all go dark.
+            logger.setLevel(logging.INFO)
+            logger.addHandler(QueueHandler(_log_queue))
+            _log_listener = QueueListener(_log_queue,
+                                          respect_handler_level=True)
+            _log_listener.start()
+        if user_id in _log_files_installed:
+            return
+        _log_files_installed.add(user_id)
+        handler = RotatingFileHandler(
+            os.path.join(config.LOG_DIR, f'trading_bot_{user_id}.log'),
+            maxBytes=5 * 1024 * 1024, backupCount=3)
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s %(message)s'))
+        handler.addFilter(_UserThreadFilter(user_id))
+        _log_listener.handlers += (handler,)
+
+
+def fetch_ohlcv_with_retry(client, symbol, timeframe, limit=100, retries=3):
+    """Fetch OHLCV bars, retrying transient exchange errors."""
+    for attempt in range(retries):
+        try:
+            return client.fetch_ohlcv(symbol, timeframe, limit=limit)
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            logger.warning(f"fetch_ohlcv failed (attempt {attempt + 1}): {e}")
+            time.sleep(2)
+
+
+
+class CandleFeed:
+    """Incremental OHLCV feed over REST.
+
+    The first poll downloads the full window; every poll after that asks
+    the exchange only for bars at or after the last known timestamp and
+    merges them into a rolling window — the streaming shape of a kline
+    subscription, minus the websocket transport, at ~1/100th of the
+    candle payload per tick.
+    """
+
+    def __init__(self, client, symbol, timeframe, limit=100):
+        self.client = client
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.limit = limit
+        self._rows = deque(maxlen=limit)
+
+    def poll(self):
+        """Refresh and return the rolling candle window (oldest first)."""
+        rows = self._rows
+        if not rows:
+            rows.extend(fetch_ohlcv_with_retry(
+                self.client, self.symbol, self.timeframe, limit=self.limit))
+            return rows
+        last_ts = rows[-1][0]
+        fresh = self.client.fetch_ohlcv(self.symbol, self.timeframe,
+                                        since=int(last_ts),
+                                        limit=self.limit)
+        for row in fresh:
+            if row[0] == rows[-1][0]:
+                rows[-1] = row          # forming candle updated in place
+            elif row[0] > rows[-1][0]:
+                rows.append(row)
+        return rows
+
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the plain-Python path is fine
+    def njit(*dargs, **dkwargs):
+        if dargs and callable(dargs[0]):
+            return dargs[0]
+
+        def wrap(fn):
+            return fn
+        return wrap
+
+
+@njit(cache=True)
+def _evaluate_exit(duration_min, entry_price, side_is_buy, current_price,
+                   highest, lowest, ts_activation, ts_pct,
+                   roi_thresholds, roi_targets, max_duration, min_movement):
+    """Scalar exit decision for an open position.
+
+    Advances the high/low trackers and derives unrealized PnL from the
+    entry price, so the whole per-tick exit evaluation is one compiled
+    call. Returns ``(code, highest, lowest)`` with code 0 = hold,
+    1 = trailing stop, 2 = smart ROI, 3 = stale timeout.
+    """
+    if current_price > highest:
+        highest = current_price
+    if current_price < lowest:
+        lowest = current_price
+    if side_is_buy:
+        pnl_pct = (current_price - entry_price) / entry_price
+    else:
+        pnl_pct = (entry_price - current_price) / entry_price
+    if pnl_pct >= ts_activation:
+        if side_is_buy:
+            if current_price <= highest * (1.0 - ts_pct):
+                return 1, highest, lowest
+        elif current_price >= lowest * (1.0 + ts_pct):
+            return 1, highest, lowest
+    idx = np.searchsorted(roi_thresholds, duration_min, side='right') - 1
+    if idx >= 0 and pnl_pct >= roi_targets[idx]:
+        return 2, highest, lowest
+    if duration_min > max_duration and abs(pnl_pct) < min_movement:
+        return 3, highest, lowest
+    return 0, highest, lowest
+
+
+_EXIT_REASONS = ('', 'Trailing stop hit', 'Smart ROI target reached',
+                 'Stale position timeout')
+
+# SMART_ROI never changes after import; freeze the pre-sorted tiers into
+# the parallel numpy arrays _evaluate_exit consumes.
+_ROI_THRESHOLDS = np.array([t for t, _ in config.SMART_ROI_TIERS],
+                           dtype=np.float64)
+_ROI_TARGETS = np.array([r for _, r in config.SMART_ROI_TIERS],
+                        dtype=np.float64)
+
+@dataclass(slots=True, frozen=True)
+class TradingParams:
+    """Loop-invariant tuning values, resolved once per bot start."""
+
+    order_type: str
+    loop_delay: float
+    amount_usdt: float
+    leverage: int
+    taker_fee: float
+    tp_pct: float
+    sl_pct: float
+    ts_activation: float
+    ts_pct: float
+    max_duration: float
+    min_movement: float
+
+
+@dataclass(slots=True, frozen=True)
+class _SideSpec:
+    """Per-direction constants for the unified entry/exit trade path."""
+
+    side: str              # Bybit position side label
+    order_side: str        # ccxt order side for entries
+    close_order_side: str  # ccxt order side that flattens the position
+    limit_key: str         # ticker field used to price limit entries
+    open_type: str
+    close_type: str
+    close_side: str        # trade-record side label when flattening
+    pnl_sign: float
+    label: str
+    trend: str             # HTF trend required for entries in this direction
+
+
+# Raw Bybit position payloads carry strings; parse them exactly once per
+# fetch so everything downstream sees numeric fields.
+Position = namedtuple('Position', 'side size avg_price')
+_FLAT_POSITION = Position(None, 0.0, 0.0)
+
+
+def _parse_position(info, fallback_price):
+    """Normalize a raw position dict (side / size / avgPrice) to numbers."""
+    return Position(info.get('side') or None,
+                    float(info.get('size') or 0),
+                    float(info.get('avgPrice') or fallback_price))
+
+
+_TRADE_TABLE = {
+    'Buy': _SideSpec('Buy', 'buy', 'sell', 'bid', 'OPEN_LONG',
+                     'CLOSE_LONG', 'Sell', 1.0, 'LONG', 'UP'),
+    'Sell': _SideSpec('Sell', 'sell', 'buy', 'ask', 'OPEN_SHORT',
+                      'CLOSE_SHORT', 'Buy', -1.0, 'SHORT', 'DOWN'),
+}
+
+_SIGNAL_SIDES = {'BUY': 'Buy', 'SELL': 'Sell'}
+
+
+@dataclass(slots=True)
+class PositionTracker:
+    """Per-position price extremes for the trailing stop.
+
+    Slotted so the per-tick reads/writes are fixed-offset, and owned by
+    the loop rather than bolted onto the strategy object.
+    """
+
+    highest: float = 0.0
+    lowest: float = math.inf
+
+    def reset(self):
+        self.highest = 0.0
+        self.lowest = math.inf
+
+
+_TF_UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400}
+
+
+def _timeframe_seconds(tf: str) -> int:
+    return int(tf[:-1]) * _TF_UNIT_SECONDS[tf[-1]]
+
+
+_credentials_cache = {}
+
+
+def _load_credentials(user_id, exchange):
+    """Decrypted API credentials for a user, cached across bot restarts.
+
+    A supervisor that bounces bots on every config change was paying a
+    DB round-trip plus two Fernet decryptions per restart; the pair only
+    changes when keys rotate, at which point the admin path should pop
+    the ``(user_id, exchange)`` entry from ``_credentials_cache``. Only
+    successful decryptions are cached — a miss is retried on the next
+    start, so a user who configures keys after a failed attempt doesn't
+    stay locked out until the process restarts.
+    """
+    key = (user_id, exchange)
+    creds = _credentials_cache.get(key)
+    if creds is not None:
+        return creds
+    db = DuckDBHandler()
+    try:
+        row = db.get_api_key(user_id, exchange)
+    finally:
+        db.close()
+    if row is None:
+        return None
+    encryption = EncryptionHelper()
+    creds = (encryption.decrypt(row['api_key_encrypted']),
+             encryption.decrypt(row['api_secret_encrypted']))
+    _credentials_cache[key] = creds
+    return creds
+
+
+_trade_queue = queue.SimpleQueue()
+_trade_writer = None
+
+
+def _journal_trade(trade_data, user_id):
+    """Hand a filled trade to the background journal writer.
+
+    The trading thread only pays a queue put; the writer thread owns its
+    own DuckDB connection and flushes in executemany batches, so journal
+    I/O never sits between a fill and the next tick.
+    """
+    global _trade_writer
+    if _trade_writer is None:
+        _trade_writer = threading.Thread(target=_drain_trades, daemon=True,
+                                         name='trade-journal')
+        _trade_writer.start()
+    _trade_queue.put((trade_data, user_id))
+
+
+def _drain_trades():
+    db = DuckDBHandler()
+    while True:
+        batch = [_trade_queue.get()]
+        deadline = time.monotonic() + 0.2
+        while len(batch) < 32:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_trade_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            db.save_trades_batch(batch)
+        except Exception as e:
+            logger.warning(f"Trade journal flush failed: {e}")
+
+
+def _seconds_to_next_bar(bar_seconds, offset=0.5):
+    """Seconds until just after the next bar-close boundary."""
+    return bar_seconds - (time.time() % bar_seconds) + offset
+
+
+def _wait(stop_event, seconds):
+    """Sleep up to ``seconds``, waking instantly when stop is signalled."""
+    if stop_event is None:
+        time.sleep(seconds)
+    else:
+        stop_event.wait(seconds)
+
+
+def _round_lot(amount, lot_step, min_amount):
+    """Floor an order amount onto the exchange lot grid."""
+    if lot_step:
+        amount = math.floor(amount / lot_step) * lot_step
+    return max(amount, min_amount)
+
+
+_ticker_cache = {}
+
+
+def _get_ticker(client, symbol, ttl=0.25):
+    """Return a ticker no older than ``ttl`` seconds, fetching on miss."""
+    ts, ticker = _ticker_cache.get(symbol, (0.0, None))
+    if ticker is not None and time.time() - ts < ttl:
+        return ticker
+    ticker = client.fetch_ticker(symbol)
+    _ticker_cache[symbol] = (time.time(), ticker)
+    return ticker
+
+
+def _wait_for_fill(client, order, symbol, stop_event=None, timeout=10.0):
+    """Poll an order until it leaves the open state.
+
+    Starts at a 100ms interval and backs off, so typical market-order
+    fills are confirmed in a fraction of the old fixed one/two-second
+    sleeps. Returns the latest order dict once terminal or on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    interval = 0.1
+    fetched = order
+    while time.monotonic() < deadline:
+        fetched = client.fetch_order(order['id'], symbol)
+        if fetched.get('status') in ('closed', 'canceled', 'rejected'):
+            break
+        _wait(stop_event, interval)
+        interval = min(interval * 2, 1.0)
+    return fetched
+
+
+
+def _execute_entry(client, db, notifier, spec, params, symbol, strategy_name,
+                   current_price, now, last_bar_ts, bar_seconds, dry_run,
+                   user_id, lot_step, min_amount, stop_event,
+                   runtime_state):
+    """Place and record an entry in ``spec``'s direction.
+
+    Returns ``(state, open_order)``: for market/dry-run fills ``state`` is
+    the refreshed bot state and ``open_order`` is ``None``; for a resting
+    limit order ``state`` is ``None`` and ``open_order`` describes the
+    pending order for the loop to babysit.
+    """
+    ticker = None
+    # The last OHLCV close is fresh enough for market orders; only hit the
+    # ticker endpoint for a limit price or when the bar has gone stale.
+    if (not dry_run and params.order_type == 'limit'
+            or now - last_bar_ts > 2 * bar_seconds):
+        ticker = _get_ticker(client, symbol)
+        current_price = ticker['last']
+    amount = _round_lot(params.amount_usdt / current_price,
+                        lot_step, min_amount)
+    if dry_run:
+        order = {'id': f"dry-{int(now * 1000)}",
+                 'average': current_price, 'filled': amount}
+    elif params.order_type == 'limit':
+        price = ticker[spec.limit_key]
+        order = client.create_order(symbol, 'limit', spec.order_side,
+                                    amount, price)
+        open_order = {'id': order['id'], 'side': spec.order_side,
+                      'deadline': time.monotonic()
+                      + config.ORDER_TIMEOUT_SECONDS}
+        db.update_bot_state(user_id, active_order_id=order['id'])
+        return None, open_order
+    else:
+        order = client.create_order(symbol, 'market', spec.order_side,
+                                    amount)
+        order = _wait_for_fill(client, order, symbol, stop_event)
+    fill_price = float(order.get('average') or current_price)
+    fee = fill_price * amount * params.taker_fee
+    trade_data = {
+        'symbol': symbol, 'side': spec.side, 'price': fill_price,
+        'amount': amount, 'type': spec.open_type, 'pnl': None,
+        'strategy': strategy_name,
+        'total_value': fill_price * amount,
+        'leverage': params.leverage, 'fee': fee,
+    }
+    _journal_trade(trade_data, user_id)
+    db.update_bot_state(
+        user_id, position_side=spec.side, position_size=amount,
+        entry_price=fill_price, position_start_time=now,
+        active_order_id=None)
+    state = db.get_bot_state(user_id) or {}
+    notifier.send_trade_alert(trade_data)
+    if runtime_state is not None:
+        # One bot = one thread, so plain attribute RMWs are safe here.
+        runtime_state.active_trades += 1
+        runtime_state.tp_price = fill_price * (
+            1 + spec.pnl_sign * params.tp_pct)
+        runtime_state.sl_price = fill_price * (
+            1 - spec.pnl_sign * params.sl_pct)
+    logger.info(f"Opened {spec.label} {amount:.6f} @ {fill_price:.2f}")
+    return state, None
+
+
+def _execute_exit(client, db, notifier, spec, params, symbol, strategy_name,
+                  entry_price, position_size, current_price, now,
+                  last_bar_ts, bar_seconds, dry_run, user_id, stop_event,
+                  runtime_state):
+    """Flatten the position described by ``spec``; return refreshed state."""
+    if now - last_bar_ts > 2 * bar_seconds:
+        ticker = _get_ticker(client, symbol)
+        current_price = ticker['last']
+    if dry_run:
+        order = {'id': f"dry-{int(now * 1000)}",
+                 'average': current_price, 'filled': position_size}
+    else:
+        order = client.create_order(symbol, 'market',
+                                    spec.close_order_side, position_size,
+                                    params={'reduceOnly': True})
+        order = _wait_for_fill(client, order, symbol, stop_event)
+    fill_price = float(order.get('average') or current_price)
+    fee = fill_price * position_size * params.taker_fee
+    pnl = spec.pnl_sign * (fill_price - entry_price) * position_size - fee
+    trade_data = {
+        'symbol': symbol, 'side': spec.close_side, 'price': fill_price,
+        'amount': position_size, 'type': spec.close_type, 'pnl': pnl,
+        'strategy': strategy_name,
+        'total_value': fill_price * position_size,
+        'leverage': params.leverage, 'fee': fee,
+    }
+    _journal_trade(trade_data, user_id)
+    db.update_bot_state(
+        user_id, position_side=None, position_size=0,
+        entry_price=None, position_start_time=None,
+        active_order_id=None)
+    state = db.get_bot_state(user_id) or {}
+    notifier.send_trade_alert(trade_data)
+    if runtime_state is not None:
+        runtime_state.active_trades = max(0, runtime_state.active_trades - 1)
+        runtime_state.pnl += pnl
+        runtime_state.tp_price = 0.0
+        runtime_state.sl_price = 0.0
+    logger.info(f"Closed {spec.label} @ {fill_price:.2f} (PnL {pnl:+.2f})")
+    return state
+
+def _to_dataframe(ohlcv):
+    return pd.DataFrame(
+        ohlcv,
+        columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'],
+    )
+
+
+def _build_strategy(strategy_name, strategy_params):
+    return STRATEGIES.get(strategy_name, MeanReversion)(**strategy_params)
+
+
+def main(client, user_id, strategy_config=None, running_event=None,
+         runtime_state=None, notifier=None, db=None, stop_event=None):
+    """Trading loop for one user on one symbol."""
+    _setup_bot_logging(user_id)
+
+    strategy_config = strategy_config or {}
+    db = db or DuckDBHandler()
+    notifier = notifier or TelegramNotifier()
+    trend_filter = TrendFilter()
+
+    symbol = strategy_config.get('SYMBOL', config.SYMBOL)
+    timeframe = strategy_config.get('TIMEFRAME', config.TIMEFRAME)
+    strategy_name = strategy_config.get('STRATEGY', config.STRATEGY)
+    strategy_params = strategy_config.get('STRATEGY_PARAMS',
+                                          config.STRATEGY_PARAMS)
+    amount_usdt = strategy_config.get('AMOUNT_USDT', config.AMOUNT_USDT)
+    dry_run = strategy_config.get('DRY_RUN', config.DRY_RUN)
+    cfg = strategy_config.get
+    params = TradingParams(
+        order_type=cfg('ORDER_TYPE', config.ORDER_TYPE),
+        loop_delay=cfg('LOOP_DELAY_SECONDS', config.LOOP_DELAY_SECONDS),
+        amount_usdt=amount_usdt,
+        leverage=cfg('LEVERAGE', config.LEVERAGE),
+        taker_fee=cfg('TAKER_FEE_PCT', config.TAKER_FEE_PCT),
+        tp_pct=cfg('TAKE_PROFIT_PCT', config.TAKE_PROFIT_PCT),
+        sl_pct=cfg('STOP_LOSS_PCT', config.STOP_LOSS_PCT),
+        ts_activation=cfg('TRAILING_STOP_ACTIVATION_PCT',
+                          config.TRAILING_STOP_ACTIVATION_PCT),
+        ts_pct=cfg('TRAILING_STOP_PCT', config.TRAILING_STOP_PCT),
+        max_duration=cfg('MAX_POSITION_DURATION_MINUTES',
+                         config.MAX_POSITION_DURATION_MINUTES),
+        min_movement=cfg('MIN_MOVEMENT_PCT', config.MIN_MOVEMENT_PCT))
+
+    strategy = _build_strategy(strategy_name, strategy_params)
+    bar_seconds = _timeframe_seconds(timeframe)
+    logger.info(f"Starting bot for user {user_id}: {strategy_name} "
+                f"on {symbol}/{timeframe}")
+
+    # Lot-size metadata resolved once, so order amounts are already
+    # exchange-aligned and ccxt skips its per-order Decimal adjustment.
+    try:
+        market = client.market(symbol)
+        lot_step = float(market['precision']['amount'] or 0) or None
+        min_amount = ((market.get('limits', {}).get('amount', {}) or {})
+                      .get('min') or 0.0)
+    except Exception:
+        lot_step, min_amount = None, 0.0
+
+    # --- startup reconciliation ------------------------------------------
+    state = db.get_bot_state(user_id) or {}
+    active_order_id = state.get('active_order_id')
+    open_order = None
+    if not dry_run:
+        try:
+            open_orders = client.fetch_open_orders(symbol)
+            logger.info(f"Connected to exchange; "
+                        f"{len(open_orders)} open order(s) found")
+            orphan_ids = []
+            for order in open_orders:
+                if order['id'] == active_order_id:
+                    open_order = {'id': order['id'],
+                                  'side': order.get('side'),
+                                  'deadline': time.monotonic()
+                                  + config.ORDER_TIMEOUT_SECONDS}
+                else:
+                    orphan_ids.append(order['id'])
+            if orphan_ids:
+                if open_order is None:
+                    # Nothing to preserve: clear them in one API call.
+                    client.cancel_all_orders(symbol)
+                else:
+                    with ThreadPoolExecutor(max_workers=4) as pool:
+                        list(pool.map(
+                            lambda oid: client.cancel_order(oid, symbol),
+                            orphan_ids))
+                logger.info(f"Cancelled {len(orphan_ids)} orphan order(s)")
+        except Exception as e:
+            logger.warning(f"Startup order reconciliation failed: {e}")
+
+    subscription_check_counter = 0
+    transient_errors = 0
+    roi_thresholds = _ROI_THRESHOLDS
+    roi_targets = _ROI_TARGETS
+    # Remaining per-iteration config reads, bound once: locals are a
+    # LOAD_FAST versus a module __dict__ walk every tick.
+    sub_check_interval = config.SUBSCRIPTION_CHECK_INTERVAL
+    higher_timeframe = config.HIGHER_TIMEFRAME
+    htf_seconds = _timeframe_seconds(higher_timeframe)
+    htf_cache = {'bucket': None, 'result': None}
+    candle_feed = CandleFeed(client, symbol, timeframe, limit=100)
+    last_pushed_ts = 0
+    last_logged_bar = 0
+    position_size = 0.0
+    tracker = PositionTracker()
+    # Small pool used to overlap the independent REST calls made at the
+    # top of each iteration (candles / HTF window / position).
+    api_pool = ThreadPoolExecutor(max_workers=2,
+                                  thread_name_prefix=f"api-{user_id}")
+
+    while ((stop_event is None or not stop_event.is_set())
+           and (running_event is None or running_event.is_set())):
+        try:
+            # One wall-clock read per iteration, reused everywhere below.
+            now = time.time()
+            # Subscription status is fetched at most once per iteration and
+            # shared between the periodic check and the entry branches.
+            sub_active = None
+            subscription_check_counter += 1
+            if subscription_check_counter >= sub_check_interval:
+                subscription_check_counter = 0
+                sub_active = db.is_subscription_active(user_id)
+                if not sub_active:
+                    logger.warning(
+                        f"Subscription inactive for user {user_id}; halting")
+                    notifier.send_error('Subscription expired — bot halted.')
+                    break
+
+            # The three REST reads at the top of an iteration are
+            # independent; farm the optional ones out to the pool so their
+            # round-trips overlap the candle poll (sum of latencies drops
+            # to roughly the max).
+            bucket = int(now // htf_seconds)
+            htf_future = None
+            if bucket != htf_cache['bucket']:
+                # 250 bars are only needed once to seed the EMA-200; after
+                # that the filter advances incrementally and each new HTF
+                # bucket just needs the latest closed bar.
+                htf_limit = 2 if htf_cache['bucket'] is not None else 250
+                htf_future = api_pool.submit(
+                    client.fetch_ohlcv, symbol, higher_timeframe,
+                    limit=htf_limit)
+            position_future = None
+            if not dry_run:
+                position_future = api_pool.submit(client.fetch_position,
+                                                  symbol)
+
+            rows = candle_feed.poll()
+            # Since indicators consume closed bars incrementally, nothing
+            # on the hot path needs a DataFrame any more: read the last-bar
+            # scalars straight off the candle rows.
+            last_row = rows[-1]
+            current_price = last_row[4]
+            last_bar_ts = last_row[0] / 1000.0
+            if runtime_state is not None:
+                runtime_state.current_price = current_price
+
+            # Higher-timeframe trend filter: the HTF candle only changes
+            # every HIGHER_TIMEFRAME, so refetch/recompute once per bucket.
+            if htf_future is not None:
+                df_htf = _to_dataframe(htf_future.result())
+                htf_cache['bucket'] = bucket
+                htf_cache['result'] = trend_filter.check_trend(df_htf)
+            trend, price_high, ema_200 = htf_cache['result']
+            # Intra-bar ticks (open position being babysat) change nothing
+            # worth logging; emit the status line once per bar.
+            if (last_row[0] != last_logged_bar
+                    and logger.isEnabledFor(logging.INFO)):
+                last_logged_bar = last_row[0]
+                logger.info(f"Price: {current_price:.2f} | Trend: {trend} | "
+                            f"EMA 200: {ema_200:.2f}")
+
+            # Pending limit order management.
+            if open_order is not None:
+                fetched = client.fetch_order(open_order['id'], symbol)
+                status = fetched['status']
+                if status == 'closed':
+                    logger.info(f"Limit order {open_order['id']} filled")
+                    open_order = None
+                    db.update_bot_state(user_id, active_order_id=None)
+                elif status in ('canceled', 'rejected'):
+                    # Killed externally (exchange, user, liquidation
+                    # engine): terminal, same as _wait_for_fill treats it.
+                    logger.info(f"Limit order {open_order['id']} {status}")
+                    open_order = None
+                    db.update_bot_state(user_id, active_order_id=None)
+                elif time.monotonic() > open_order['deadline']:
+                    client.cancel_order(open_order['id'], symbol)
+                    logger.info(f"Limit order {open_order['id']} timed out")
+                    open_order = None
+                    db.update_bot_state(user_id, active_order_id=None)
+                else:
+                    _wait(stop_event, 1)
+                    continue
+
+            # Current position, parsed once into numeric fields. A failed
+            # fetch propagates into the typed handlers below and skips the
+            # iteration: assuming flat here would let an entry signal stack
+            # a second position on top of the real one.
+            position = _FLAT_POSITION
+            if position_future is not None:
+                raw = position_future.result()
+                position = _parse_position((raw or {}).get('info') or {},
+                                           current_price)
+            elif state.get('position_side'):
+                position = Position(
+                    state.get('position_side'),
+                    float(state.get('position_size') or 0),
+                    float(state.get('entry_price') or current_price))
+            current_pos_side = position.side
+            position_size = position.size
+
+            # Indicators advance one closed bar at a time: O(1) recurrences
+            # per bar instead of a full-window recompute every tick. The
+            # forming bar (rows[-1]) is never pushed.
+            if len(rows) > 1 and rows[-2][0] > last_pushed_ts:
+                if last_pushed_ts == 0:
+                    closes = np.array(rows, dtype=np.float64)[:-1, 4]
+                    signal = strategy.warmup(closes)
+                else:
+                    # More than one bar can close between successful polls
+                    # (error backoff, rate-limit storm); replay every
+                    # missed close so the recurrences stay bar-for-bar
+                    # exact, acting only on the newest signal.
+                    signal = 'HOLD'
+                    for row in rows[:-1]:
+                        if row[0] > last_pushed_ts:
+                            signal = strategy.push(float(row[4]))
+                last_pushed_ts = rows[-2][0]
+            else:
+                signal = 'HOLD'
+            if signal != 'HOLD':
+                logger.info(f"Signal: {signal}")
+
+            # Apply the HTF trend filter to entries.
+            if (position_size == 0 and signal != 'HOLD'
+                    and trend != _TRADE_TABLE[_SIGNAL_SIDES[signal]].trend):
+                signal = 'HOLD'
+
+            # --- exit management (trailing stop / smart ROI / timeout) ----
+            if position_size > 0:
+                avg_price = position.avg_price or current_price
+                start_ts = state.get('position_start_time') or now
+                duration_minutes = (now - start_ts) / 60.0
+
+                # Tracker advance, PnL math and the three exit rules in
+                # one compiled-friendly scalar helper.
+                exit_code, tracker.highest, tracker.lowest = \
+                    _evaluate_exit(
+                        duration_minutes, avg_price,
+                        current_pos_side == 'Buy', float(current_price),
+                        tracker.highest, tracker.lowest,
+                        params.ts_activation, params.ts_pct,
+                        roi_thresholds, roi_targets,
+                        params.max_duration, params.min_movement)
+                if exit_code:
+                    logger.info(_EXIT_REASONS[exit_code])
+                    signal = 'SELL' if current_pos_side == 'Buy' else 'BUY'
+            else:
+                tracker.reset()
+
+
+            # --- entries / exits (table-driven, one code path per kind) ---
+            signal_side = _SIGNAL_SIDES.get(signal)
+            if signal_side is not None and position_size == 0:
+                if sub_active is None:
+                    sub_active = db.is_subscription_active(user_id)
+                if not sub_active:
+                    logger.warning('Subscription inactive; entry blocked')
+                    _wait(stop_event, params.loop_delay)
+                    continue
+                new_state, open_order = _execute_entry(
+                    client, db, notifier, _TRADE_TABLE[signal_side], params,
+                    symbol, strategy_name, current_price, now, last_bar_ts,
+                    bar_seconds, dry_run, user_id, lot_step, min_amount,
+                    stop_event, runtime_state)
+                if open_order is not None:
+                    # Resting limit order; babysit it next iteration.
+                    continue
+                state = new_state
+
+            elif (signal_side is not None and position_size > 0
+                    and current_pos_side in _TRADE_TABLE
+                    and signal_side != current_pos_side):
+                state = _execute_exit(
+                    client, db, notifier, _TRADE_TABLE[current_pos_side],
+                    params, symbol, strategy_name,
+                    position.avg_price or current_price, position_size,
+                    current_price, now, last_bar_ts, bar_seconds, dry_run,
+                    user_id, stop_event, runtime_state)
+
+            transient_errors = 0
+
+        except ccxt.RateLimitExceeded:
+            _wait(stop_event, 5)
+            continue
+        except (ccxt.NetworkError, ccxt.RequestTimeout):
+            # Transient connectivity blip: back off quietly, no traceback.
+            transient_errors += 1
+            _wait(stop_event, min(30, 2 ** transient_errors))
+            continue
+        except Exception as e:
+            # exc_info defers traceback formatting to the logging handler.
+            logger.error("Loop error for user %s: %s", user_id, e,
+                         exc_info=True)
+            try:
+                notifier.send_error(str(e))
+            except Exception:
+                pass
+            _wait(stop_event, 2)
+
+        if (open_order is None and position_size == 0
+                and not state.get('position_side')):
+            # Flat with nothing pending: no exit or fill to babysit, so
+            # sleep straight to the next bar close instead of waking
+            # bar_seconds / loop_delay times to recompute the same signal.
+            _wait(stop_event, _seconds_to_next_bar(bar_seconds))
+        else:
+            _wait(stop_event, params.loop_delay)
+
+    api_pool.shutdown(wait=False)
+    logger.info(f"Bot loop exited for user {user_id}")
+
+
+def run_bot_instance(user_id, strategy_config=None, running_event=None,
+                     runtime_state=None, stop_event=None):
+    """Per-user entry point: resolve credentials, build the client, run.
+
+    Each bot is fully self-contained on its own thread: its own DuckDB
+    connection, exchange client, notifier and log file, so one user's bot
+    never shares mutable state with another's.
+    """
+    thread = threading.current_thread()
+    if not thread.name.startswith('Bot-User-'):
+        thread.name = f'Bot-User-{user_id}'
+    strategy_config = strategy_config or {}
+    db = DuckDBHandler()
+
+    dry_run = strategy_config.get('DRY_RUN', config.DRY_RUN)
+    exchange = strategy_config.get('EXCHANGE', config.EXCHANGE)
+
+    # One joined query for user, credentials and risk profile.
+    bootstrap = db.get_bot_bootstrap(user_id, exchange)
+    if bootstrap is None:
+        raise RuntimeError(f"Unknown user {user_id}")
+
+    api_key = config.BYBIT_API_KEY
+    api_secret = config.BYBIT_API_SECRET
+    if not dry_run:
+        creds = _load_credentials(user_id, exchange)
+        if creds is None:
+            raise RuntimeError(
+                f"No {exchange} API key configured for user {user_id}")
+        api_key, api_secret = creds
+    # Per-user risk overrides sit beneath the explicit strategy config:
+    # anything the caller passed wins, the profile fills in the rest.
+    risk_profile = bootstrap['risk_profile_json']
+    if risk_profile:
+        try:
+            strategy_config = {**json.loads(risk_profile),
+                               **strategy_config}
+        except ValueError:
+            logger.warning(
+                f"Ignoring malformed risk profile for user {user_id}")
+
+    client = client_manager.get_client(
+        user_id, exchange, api_key, api_secret,
+        strategy_config.get('SYMBOL', config.SYMBOL))
+
+    notifier = TelegramNotifier(chat_id=bootstrap.get('telegram_chat_id')
+                                or config.TELEGRAM_CHAT_ID)
+
+    try:
+        main(client, user_id, strategy_config=strategy_config,
+             running_event=running_event, runtime_state=runtime_state,
+             notifier=notifier, db=db, stop_event=stop_event)
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    run_bot_instance(1)
@@ -0,0 +1,345 @@
+"""Bot lifecycle supervisor.
+
+One ``BotManager`` per process owns every running bot: it spawns a thread
+per (user, config) pair running :func:`backend.bot.run_bot_instance`,
+tracks their runtime state, captures their recent log lines for the API
+layer, and stops or restarts them on demand.
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from . import bot, config
+
+# Bound once so bot starts don't repeat the module-attribute walk.
+_run_bot_instance = bot.run_bot_instance
+
+logger = logging.getLogger('TradingBot.Manager')
+
+
+def _iso_from_ns(ns):
+    return datetime.fromtimestamp(ns / 1e9).isoformat()
+
+
+# Single-char substitution table, built once; str.translate with a
+# precomputed table beats str.replace for this.
+_SYMBOL_TRANS = str.maketrans('/', '-')
+
+# Log lines kept per bot for the API's status endpoint. Power of two so
+# the ring index wraps with a mask instead of a modulo.
+_LOG_RING_SIZE = 64
+
+
+def _config_hash(strategy_config) -> int:
+    """Order-insensitive hash of a config dict.
+
+    Values go through ``repr`` so nested structures (STRATEGY_PARAMS is a
+    dict) stay hashable.
+    """
+    return hash(tuple(sorted(
+        (k, repr(v)) for k, v in strategy_config.items())))
+
+
+@dataclass(slots=True)
+class RuntimeState:
+    """Fixed-schema live metrics for one bot, shared with its loop.
+
+    The bot's own thread is the only writer; status polls read the slot
+    attributes directly, so neither side touches a dict or a lock.
+    """
+
+    active_trades: int = 0
+    pnl: float = 0.0
+    current_price: float = 0.0
+    tp_price: float = 0.0
+    sl_price: float = 0.0
+
+
+@dataclass(slots=True, frozen=True)
+class StrategyConfig:
+    """Immutable, slotted snapshot of the fields the manager reads.
+
+    The raw dict still travels to the engine (whose knobs are a superset
+    and keyed by env-style names); the manager's own hot paths read
+    fixed-offset attributes off this instead of hashing dict keys.
+    """
+
+    strategy: str = 'unknown'
+    symbol: str = 'unknown'
+    timeframe: str = 'unknown'
+    dry_run: bool = False
+
+    @classmethod
+    def from_dict(cls, strategy_config):
+        return cls(
+            strategy=strategy_config.get('STRATEGY', 'unknown'),
+            symbol=strategy_config.get('SYMBOL', config.SYMBOL),
+            timeframe=strategy_config.get('TIMEFRAME', config.TIMEFRAME),
+            dry_run=bool(strategy_config.get('DRY_RUN', config.DRY_RUN)),
+        )
+
+
+class _CaptureQueueHandler(QueueHandler):
+    """Hands bot records to the capture listener with their sink attached.
+
+    Runs on the emitting thread, so this is where the thread-attribute
+    lookup must happen: the owning instance (set by
+    ``bot_thread_wrapper``) is stamped onto the record before it crosses
+    to the listener. Records from non-bot threads carry no sink and are
+    dropped without even being enqueued. Unlike the stock QueueHandler
+    this skips ``prepare`` — the record never leaves the process, so
+    there is nothing to make picklable and no reason to format it here.
+    """
+
+    def emit(self, record):
+        sink = getattr(threading.current_thread(), 'log_sink', None)
+        if sink is None:
+            return
+        record.log_sink = sink
+        try:
+            self.enqueue(record)
+        except Exception:
+            self.handleError(record)
+
+
+class LogCaptureHandler(logging.Handler):
+    """Writes captured records into per-bot log rings.
+
+    Runs on the capture listener's thread, off the trading loop; the
+    target instance travels on the record itself.
+    """
+
+    def emit(self, record):
+        sink = record.log_sink
+        # Overwrite-in-place ring: the same slots are reused forever, so
+        # steady-state logging allocates nothing but the line itself.
+        i = sink._log_idx
+        sink._log_ring[i] = self.format(record)
+        sink._log_idx = (i + 1) & (_LOG_RING_SIZE - 1)
+
+
+class BotInstance:
+    """One supervised bot: its thread, stop signal, state and log tail."""
+
+    __slots__ = ('user_id', 'config_id', 'strategy_config', 'config',
+                 'thread_name', 'cfg_hash', 'thread', 'running_event',
+                 'stop_event', 'runtime_state', '_log_ring', '_log_idx',
+                 'started_ns', 'stopped_ns', '_running', '_static_status',
+                 '_started_iso', '_stopped_iso')
+
+    def __init__(self, user_id, config_id, strategy_config):
+        self.user_id = user_id
+        self.config_id = config_id
+        self.strategy_config = strategy_config
+        self.config = StrategyConfig.from_dict(strategy_config)
+        # The naming convention is load-bearing: the log capture handler
+        # and per-user log filter both key off the Bot-User-{id} prefix,
+        # so build the name in exactly one place.
+        self.thread_name = (f"Bot-User-{user_id}-"
+                            f"{self.config.symbol.translate(_SYMBOL_TRANS)}")
+        self.cfg_hash = _config_hash(strategy_config)
+        self.thread: Optional[threading.Thread] = None
+        self.running_event = threading.Event()
+        # Set exactly once to stop the bot; the loop's waits block on it
+        # so a stop wakes the thread immediately instead of after the
+        # current sleep expires.
+        self.stop_event = threading.Event()
+        self.runtime_state = RuntimeState()
+        self._log_ring = [None] * _LOG_RING_SIZE
+        self._log_idx = 0
+        # Lifecycle timestamps as raw nanoseconds; the ISO strings are
+        # rendered once at each start/stop transition, so status polls
+        # return the cached strings with zero datetime work.
+        self.started_ns = 0
+        self.stopped_ns = 0
+        # Maintained by bot_thread_wrapper's try/finally and cleared on
+        # stop requests; the status paths read this plain bool instead
+        # of touching the Event's Condition or Thread.is_alive().
+        self._running = False
+        # Everything immutable after construction, built once; get_status
+        # only patches in the handful of fields that actually change.
+        self._static_status = {
+            'user_id': user_id,
+            'config_id': config_id,
+            'strategy': self.config.strategy,
+            'symbol': self.config.symbol,
+        }
+        self._started_iso: Optional[str] = None
+        self._stopped_iso: Optional[str] = None
+
+    @property
+    def started_at(self):
+        """Lifecycle start as a datetime, built only when asked for."""
+        if not self.started_ns:
+            return None
+        return datetime.fromtimestamp(self.started_ns / 1e9)
+
+    @property
+    def stopped_at(self):
+        if not self.stopped_ns:
+            return None
+        return datetime.fromtimestamp(self.stopped_ns / 1e9)
+
+    def log_lines(self) -> list:
+        """Return captured log lines, oldest first."""
+        i = self._log_idx
+        ring = self._log_ring
+        return [line for line in ring[i:] + ring[:i] if line is not None]
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def get_status(self) -> dict:
+        return {
+            **self._static_status,
+            'is_running': self.is_running(),
+            'started_at': self._started_iso,
+            'stopped_at': self._stopped_iso,
+            'active_trades': self.runtime_state.active_trades,
+            'pnl': self.runtime_state.pnl,
+            'current_price': self.runtime_state.current_price,
+            'logs': self.log_lines(),
+        }
+
+
+class BotManager:
+    """Supervises one thread per running bot.
+
+    One instance per process: ``bot_manager`` is built at the bottom of
+    this module (imports are serialized by the import lock, so no
+    further synchronization is needed).
+    """
+
+    def __init__(self):
+        # Copy-on-write: mutations take instances_lock and rebind a fresh
+        # dict; readers snapshot self.instances and iterate without
+        # locking, so status polls never contend with start/stop.
+        # Keyed by (user_id, config_id) — one hash per lookup instead of
+        # the two a nested per-user dict would cost.
+        self.instances: Dict[Tuple[int, int], BotInstance] = {}
+        # Flat index over every tracked instance, rebuilt on mutation,
+        # so snapshot endpoints walk one list instead of dict views.
+        self._flat_instances = []
+        # Lifecycle ops are serialized per user by a striped lock
+        # (user_id & 15 picks the stripe), so unrelated users start and
+        # stop in parallel; the structure lock covers only the brief
+        # copy-on-write rebind of the shared maps.
+        self._stripes = tuple(threading.Lock() for _ in range(16))
+        self._structure_lock = threading.Lock()
+        # Bot threads pay only a SimpleQueue.put per captured record;
+        # formatting and the ring write happen on the listener thread.
+        capture = LogCaptureHandler()
+        capture.setFormatter(
+            logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        self._log_queue = queue.SimpleQueue()
+        self._log_listener = QueueListener(self._log_queue, capture,
+                                           respect_handler_level=True)
+        self._log_listener.start()
+        logging.getLogger('TradingBot').addHandler(
+            _CaptureQueueHandler(self._log_queue))
+
+    # --- lifecycle --------------------------------------------------------
+
+    def bot_thread_wrapper(self, instance):
+        # Runs on the bot's own thread: stash the instance where
+        # LogCaptureHandler.emit can reach it with one getattr.
+        threading.current_thread().log_sink = instance
+        instance.running_event.set()
+        instance._running = True
+        instance.started_ns = time.time_ns()
+        instance._started_iso = _iso_from_ns(instance.started_ns)
+        try:
+            _run_bot_instance(
+                instance.user_id,
+                strategy_config=instance.strategy_config,
+                running_event=instance.running_event,
+                runtime_state=instance.runtime_state,
+                stop_event=instance.stop_event)
+        except Exception:
+            # %-style args and exc_info defer all formatting to the
+            # handler; nothing is built if the level is filtered.
+            logger.exception("Bot crashed for user %s (config %s)",
+                             instance.user_id, instance.config_id)
+        finally:
+            instance._running = False
+            instance.running_event.clear()
+            instance.stopped_ns = time.time_ns()
+            instance._stopped_iso = _iso_from_ns(instance.stopped_ns)
+
+    def start_bot(self, user_id, config_id=0, strategy_config=None) -> bool:
+        """Start a bot for the user; returns False if already running."""
+        with self._stripes[user_id & 15]:
+            existing = self.instances.get((user_id, config_id))
+            if existing is not None and existing.is_running():
+                return False
+            instance = BotInstance(user_id, config_id, strategy_config or {})
+            instance.thread = threading.Thread(
+                target=self.bot_thread_wrapper, args=(instance,),
+                name=instance.thread_name,
+                daemon=True)
+            with self._structure_lock:
+                self.instances = {**self.instances,
+                                  (user_id, config_id): instance}
+                self._flat_instances = [i for i in self._flat_instances
+                                        if i is not existing] + [instance]
+        instance.thread.start()
+        return True
+
+    def _stop_bot_internal(self, instance, timeout=10):
+        instance._running = False
+        instance.stop_event.set()
+        instance.running_event.clear()
+        if instance.thread is not None:
+            instance.thread.join(timeout=timeout)
+        instance.stopped_ns = time.time_ns()
+        instance._stopped_iso = _iso_from_ns(instance.stopped_ns)
+
+    def stop_bot(self, user_id, config_id=0) -> bool:
+        with self._stripes[user_id & 15]:
+            instance = self.instances.get((user_id, config_id))
+            if instance is None or not instance.is_running():
+                return False
+            self._stop_bot_internal(instance)
+        return True
+
+    def restart_bot(self, user_id, config_id=0, strategy_config=None) -> bool:
+        # A UI re-submitting the same config is a no-op: skip the thread
+        # teardown (join can block for seconds) and respawn entirely.
+        existing = self.instances.get((user_id, config_id))
+        if (existing is not None and existing.is_running()
+                and existing.cfg_hash == _config_hash(strategy_config or {})):
+            return True
+        self.stop_bot(user_id, config_id)
+        return self.start_bot(user_id, config_id, strategy_config)
+
+    def stop_all(self):
+        # Bind one snapshot: the list is rebound (never mutated) by
+        # start_bot, so iteration never races a concurrent start.
+        snapshot = self._flat_instances
+        for instance in snapshot:
+            self._stop_bot_internal(instance)
+
+    # --- status -----------------------------------------------------------
+
+    def get_status(self, user_id, config_id=0):
+        instance = self.instances.get((user_id, config_id))
+        return instance.get_status() if instance else None
+
+    def get_running_event(self, user_id, config_id=0):
+        instance = self.instances.get((user_id, config_id))
+        return instance.running_event if instance else None
+
+    def get_all_running(self):
+        snapshot = self._flat_instances
+        return [instance.get_status()
+                for instance in snapshot
+                if instance.is_running()]
+
+
+bot_manager = BotManager()
@@ -0,0 +1,153 @@
+"""Exchange-client construction, warm-up and caching.
+
+Everything needed to stand up a ready-to-trade ccxt client lives here —
+session pooling, sandbox wiring, the shared market map and transport
+pre-warm — so the bot entry point and any future callers build clients
+through one code path instead of each growing their own copy.
+"""
+
+import logging
+import threading
+from functools import lru_cache
+from weakref import WeakValueDictionary
+
+import ccxt
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger('TradingBot.Clients')
+
+
+@lru_cache(maxsize=16)
+def _exchange_class(name):
+    """Resolve a ccxt exchange class by name, memoized.
+
+    The supported set is static after startup, so repeat lookups skip
+    the module-attribute walk and the unsupported-name raise path.
+    """
+    try:
+        return getattr(ccxt, name)
+    except AttributeError:
+        raise ValueError(f"Unsupported exchange: {name}") from None
+
+
+def _pooled_session():
+    """requests.Session with a pooled HTTPS adapter and light retries.
+
+    ccxt's default session works, but an explicit keep-alive pool sized
+    for the bot's concurrency (loop thread + api_pool) plus a two-shot
+    retry with backoff avoids both handshake churn and one-off 5xx
+    blips surfacing as loop errors.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=8, pool_maxsize=8,
+        max_retries=Retry(total=2, backoff_factor=0.1,
+                          status_forcelist=(502, 503, 504)))
+    session.mount('https://', adapter)
+    return session
+
+
+# Market maps are shared across every client on the same exchange.
+_markets_cache = {}
+
+
+def _load_markets_cached(client):
+    """Load (and share) the exchange market map across bot instances."""
+    markets = _markets_cache.get(client.id)
+    if markets is None:
+        markets = client.load_markets()
+        _markets_cache[client.id] = markets
+    else:
+        client.set_markets(markets)
+    return markets
+
+
+def _prewarm_client(client, symbol):
+    """Warm the transport and codecs before the loop needs them.
+
+    The first HTTPS request pays TLS handshake plus JSON-serializer
+    specialization — worst absorbed by a live order. One throwaway
+    time-sync and ticker round-trip moves that cost to startup, and when
+    orjson is available it replaces ccxt's stdlib JSON codec outright.
+    """
+    if orjson is not None:
+        client.parse_json = orjson.loads
+        client.json = lambda obj: orjson.dumps(obj).decode()
+    try:
+        client.fetch_time()
+        client.fetch_ticker(symbol)
+    except Exception as e:
+        logger.warning(f"Client pre-warm failed (non-fatal): {e}")
+
+
+class ClientManager:
+    """Caches one warmed exchange client per (user, exchange) pair.
+
+    Bots that bounce on config reloads reuse the cached client — its
+    TLS session, market map and codec hooks — instead of paying the
+    full construction and warm-up cost again.
+    """
+
+    def __init__(self):
+        # Weak values: each running bot holds a strong reference to its
+        # client for its whole lifetime, so entries evaporate once the
+        # last bot using them stops instead of accumulating connection
+        # pools for every (user, exchange) ever seen.
+        self._clients = WeakValueDictionary()
+        self._clients_lock = threading.Lock()
+
+    def get_client(self, user_id, exchange, api_key, api_secret, symbol):
+        # Tuple key: hashing a small int + interned string beats building
+        # and hashing a fresh formatted string per call. Falsy user ids
+        # (scanner, scripts running on the shared demo keys) normalize to
+        # None so they share one client per exchange.
+        cache_key = (user_id or None, exchange)
+        # Lock-free fast path: dict.get is atomic under the GIL, and a
+        # hit returns a fully constructed client. The lock only guards
+        # the build, with a re-check so two simultaneous misses don't
+        # construct (and warm) the same client twice.
+        client = self._clients.get(cache_key)
+        if client is not None:
+            return client
+        with self._clients_lock:
+            client = self._clients.get(cache_key)
+            if client is not None:
+                return client
+            client = self._build(exchange, api_key, api_secret, symbol)
+            self._clients[cache_key] = client
+            return client
+
+    def invalidate(self, user_id, exchange):
+        """Drop a cached client, e.g. after a credential rotation."""
+        # Same falsy-id normalization as get_client, or anonymous
+        # clients could never be evicted.
+        with self._clients_lock:
+            self._clients.pop((user_id or None, exchange), None)
+
+    def _build(self, exchange, api_key, api_secret, symbol):
+        client = _exchange_class(exchange)({
+            'apiKey': api_key,
+            'secret': api_secret,
+            'enableRateLimit': True,
+            'options': {'defaultType': 'swap'},
+        })
+        client.session = _pooled_session()
+        if config.BYBIT_DEMO:
+            client.set_sandbox_mode(True)
+        # Cheap unauthenticated smoke test; auth errors surface on the
+        # first real call, which is already wrapped in try/except.
+        _load_markets_cached(client)
+        _prewarm_client(client, symbol)
+        return client
+
+
+client_manager = ClientManager()
@@ -0,0 +1,102 @@
+"""Central configuration for the trading engine.
+
+Values come from the environment (.env) with sensible defaults, and can be
+overridden per-deployment by an optional ``config.json`` next to the package.
+"""
+
+import json
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Exchange -------------------------------------------------------------
+EXCHANGE = os.getenv('EXCHANGE', 'bybit')
+BYBIT_API_KEY = os.getenv('BYBIT_API_KEY', '')
+BYBIT_API_SECRET = os.getenv('BYBIT_API_SECRET', '')
+BYBIT_DEMO = os.getenv('BYBIT_DEMO', 'True').lower() in ('1', 'true', 'yes')
+
+# --- Market / strategy ----------------------------------------------------
+SYMBOL = 'BTC/USDT:USDT'
+TIMEFRAME = '1m'
+HIGHER_TIMEFRAME = '1h'
+STRATEGY = 'mean_reversion'
+STRATEGY_PARAMS = {}
+AMOUNT_USDT = 100.0
+LEVERAGE = 5
+DRY_RUN = True
+
+# --- Risk management ------------------------------------------------------
+TAKE_PROFIT_PCT = 0.01
+STOP_LOSS_PCT = 0.005
+TRAILING_STOP_ACTIVATION_PCT = 0.006
+TRAILING_STOP_PCT = 0.003
+MAX_POSITION_DURATION_MINUTES = 60
+MIN_MOVEMENT_PCT = 0.005
+TAKER_FEE_PCT = 0.00055
+
+# Smart ROI: once a position has been open for N minutes, accept a smaller
+# profit target (minutes -> ROI fraction).
+SMART_ROI = {
+    0: 0.008,
+    30: 0.005,
+    60: 0.003,
+    120: 0.001,
+}
+
+# Scanner score -> position size multiplier.
+POSITION_SIZES = {
+    0: 0.0,
+    1: 0.5,
+    2: 0.75,
+    3: 1.0,
+}
+
+# Precomputed views, built once at import: per-bar consumers iterate the
+# pre-sorted tier pairs and index the dense size array instead of
+# re-sorting or hashing the dicts above on every call.
+SMART_ROI_TIERS = tuple(sorted(SMART_ROI.items()))
+POSITION_SIZES_ARR = tuple(POSITION_SIZES.get(i, 0.0) for i in range(4))
+
+# --- Engine ---------------------------------------------------------------
+LOOP_DELAY_SECONDS = 5
+ORDER_TYPE = 'market'
+ORDER_TIMEOUT_SECONDS = 60
+SUBSCRIPTION_CHECK_INTERVAL = 12  # loop iterations between subscription checks
+SCANNER_INTERVAL_MINUTES = 15
+
+# --- Notifications --------------------------------------------------------
+TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
+TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')
+
+# --- Persistence ----------------------------------------------------------
+DB_FILE = os.getenv('DB_FILE', os.path.join('data', 'trading_bot.duckdb'))
+# DuckDB tuning, applied as PRAGMAs at connect time.
+DB_THREADS = int(os.getenv('DB_THREADS', '4'))
+DB_MEMORY_LIMIT = os.getenv('DB_MEMORY_LIMIT', '2GB')
+DB_CHECKPOINT_THRESHOLD = os.getenv('DB_CHECKPOINT_THRESHOLD', '1GB')
+LOG_DIR = os.getenv('LOG_DIR', 'logs')
+
+# --- Optional JSON overrides ----------------------------------------------
+# Keys config.json may override; anything else in the file is ignored.
+_OVERRIDE_KEYS = ('SYMBOL', 'TIMEFRAME', 'AMOUNT_USDT', 'STRATEGY',
+                  'STRATEGY_PARAMS', 'DRY_RUN', 'TAKE_PROFIT_PCT',
+                  'STOP_LOSS_PCT')
+_MISSING = object()
+
+config_path = os.path.join(os.path.dirname(__file__), '..', 'config.json')
+# One stat doubles as the existence check and records the mtime, so a
+# future hot-reload only has to re-parse when the file actually changed.
+try:
+    _config_mtime = os.stat(config_path).st_mtime
+except OSError:
+    _config_mtime = None
+if _config_mtime is not None:
+    with open(config_path) as f:
+        dynamic_config = json.load(f)
+    for _key in _OVERRIDE_KEYS:
+        _value = dynamic_config.get(_key, _MISSING)
+        if _value is not _MISSING:
+            globals()[_key] = _value
+    del _key, _value
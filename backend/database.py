@@ -0,0 +1,555 @@
+"""DuckDB persistence layer.
+
+Single-file database (``data/trading_bot.duckdb``) shared by the API layer
+and the trading engine. One handler instance owns one connection.
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+import duckdb
+
+from . import config
+
+logger = logging.getLogger('TradingBot.Database')
+
+# Hot statements as module-level constants: the same SQL text object is
+# passed on every call, so DuckDB's internal statement cache hits instead
+# of re-parsing freshly built strings, and Python never re-concatenates
+# the literals.
+_SQL_INSERT_TRADES = (
+    "INSERT INTO trades (user_id, symbol, side, price, amount, "
+    "type, pnl, strategy, total_value, leverage) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+_SQL_INSERT_RESULT = (
+    "INSERT INTO backtest_results (strategy, symbol, timeframe, "
+    "return_pct, win_rate, max_drawdown, sharpe, parameters) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+_SQL_USER_BY_EMAIL = (
+    "SELECT id, email, password_hash, telegram_chat_id, "
+    "subscription_tier, subscription_expires_at FROM users WHERE email = ?")
+_SQL_CREATE_USER = (
+    "INSERT INTO users (email, password_hash) "
+    "VALUES (?, ?) RETURNING id")
+_SQL_UPSERT_BOT_STATE = (
+    "INSERT OR REPLACE INTO bot_state (user_id, position_side, "
+    "position_size, entry_price, position_start_time, active_order_id, "
+    "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)")
+# Explicit projection with the timestamp rendered in SQL: callers want
+# display strings anyway, and formatting here avoids a per-element
+# Python astype(str) pass over a fresh object column.
+_SQL_SUM_PNL = "SELECT SUM(pnl) FROM trades WHERE pnl IS NOT NULL"
+_SQL_GET_TRADES = (
+    "SELECT id, strftime(timestamp, '%Y-%m-%d %H:%M:%S') AS timestamp, "
+    "symbol, side, price, amount, type, pnl, strategy, total_value, "
+    "leverage FROM trades ORDER BY trades.timestamp DESC LIMIT ?")
+_SQL_LEADERBOARD = (
+    "SELECT * FROM backtest_results ORDER BY return_pct DESC LIMIT ?")
+_SQL_GET_BOT_STATE = (
+    "SELECT position_side, position_size, entry_price, "
+    "position_start_time, active_order_id FROM bot_state "
+    "WHERE user_id = ?")
+
+
+class DuckDBHandler:
+    """Thin wrapper over a DuckDB connection for users, trades and bot state."""
+
+    # Rows buffered before a batched flush; DuckDB pays per-statement
+    # parse/plan cost, so writes go to memory and hit the database in
+    # executemany batches.
+    _FLUSH_ROWS = 500
+
+    # Sibling cursors for the read paths; a DuckDB connection runs one
+    # query at a time, so concurrent dashboard reads borrow from this
+    # pool instead of serializing on the writer connection.
+    _POOL_SIZE = min(os.cpu_count() or 2, 4)
+
+    # How long the cached PnL total may lag trades written through other
+    # handlers before a poll re-aggregates it.
+    _PNL_TTL = 1.0
+
+    def __init__(self, db_file: str = None):
+        self.db_file = db_file or config.DB_FILE
+        db_dir = os.path.dirname(self.db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = duckdb.connect(self.db_file)
+        # Bound memory, capped query parallelism and a raised checkpoint
+        # threshold so trade-burst writes don't force checkpoints
+        # mid-flight; all overridable from the environment.
+        self.conn.execute(
+            f"PRAGMA threads={config.DB_THREADS}; "
+            f"PRAGMA memory_limit='{config.DB_MEMORY_LIMIT}'; "
+            f"PRAGMA checkpoint_threshold="
+            f"'{config.DB_CHECKPOINT_THRESHOLD}'")
+        self.create_tables()
+        self._trade_buffer = []
+        self._result_buffer = []
+        # Flush is reachable from to_thread workers as well as the
+        # owning thread; the lock keeps the executemany-then-clear
+        # read-modify-write atomic so concurrent reads can't double-
+        # insert or drop buffered rows.
+        self._buffer_lock = threading.Lock()
+        self._cursor_pool = queue.Queue()
+        for _ in range(self._POOL_SIZE):
+            self._cursor_pool.put(self.conn.cursor())
+        # One priming round-trip seeds both caches: the table set (read
+        # by the existence checks instead of a catalog scan — tables are
+        # never dropped for good at runtime) and the running PnL total.
+        # Local writes advance the total immediately; get_total_pnl
+        # re-reads it on a short TTL to pick up trades journalled by
+        # other handlers (the engine's journal writer owns its own
+        # connection).
+        tables, pnl = self.conn.execute(
+            "SELECT (SELECT list(table_name) FROM information_schema.tables "
+            "WHERE table_schema = 'main'), "
+            "(SELECT COALESCE(SUM(pnl), 0) FROM trades "
+            "WHERE pnl IS NOT NULL)").fetchone()
+        self._tables = set(tables or ())
+        self._pnl_total = float(pnl)
+        self._pnl_refreshed = time.monotonic()
+        # Auth hits the email lookup on every request; cache per handler,
+        # cleared whenever this handler writes to users.
+        self._user_by_email = lru_cache(maxsize=1024)(
+            self._fetch_user_by_email)
+        atexit.register(self.flush)
+
+    @contextmanager
+    def _acquire(self):
+        """Borrow a read cursor from the pool; blocks when all are busy."""
+        cur = self._cursor_pool.get()
+        try:
+            yield cur
+        finally:
+            self._cursor_pool.put(cur)
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one commit (one WAL fsync)."""
+        self.conn.execute("BEGIN TRANSACTION")
+        try:
+            yield self.conn
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        else:
+            self.conn.execute("COMMIT")
+
+    # --- schema -----------------------------------------------------------
+
+    def create_tables(self):
+        self.conn.execute("""
+            CREATE SEQUENCE IF NOT EXISTS seq_user_id START 1;
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY DEFAULT nextval('seq_user_id'),
+                email VARCHAR UNIQUE NOT NULL,
+                password_hash VARCHAR NOT NULL,
+                telegram_chat_id VARCHAR,
+                subscription_tier VARCHAR DEFAULT 'free',
+                subscription_expires_at TIMESTAMP,
+                created_at TIMESTAMP DEFAULT current_timestamp
+            );
+            CREATE SEQUENCE IF NOT EXISTS seq_api_key_id START 1;
+            CREATE TABLE IF NOT EXISTS api_keys (
+                id INTEGER PRIMARY KEY DEFAULT nextval('seq_api_key_id'),
+                user_id INTEGER NOT NULL,
+                exchange VARCHAR NOT NULL,
+                api_key_encrypted VARCHAR NOT NULL,
+                api_secret_encrypted VARCHAR NOT NULL,
+                created_at TIMESTAMP DEFAULT current_timestamp
+            );
+            CREATE TABLE IF NOT EXISTS risk_profiles (
+                user_id INTEGER PRIMARY KEY,
+                risk_profile_json VARCHAR
+            );
+            CREATE TABLE IF NOT EXISTS bot_state (
+                user_id INTEGER PRIMARY KEY,
+                position_side VARCHAR,
+                position_size DOUBLE DEFAULT 0,
+                entry_price DOUBLE,
+                -- unix epoch seconds; converted to datetime lazily on read
+                position_start_time DOUBLE,
+                active_order_id VARCHAR,
+                updated_at DOUBLE
+            );
+            CREATE SEQUENCE IF NOT EXISTS seq_trade_id START 1;
+            CREATE TABLE IF NOT EXISTS trades (
+                id INTEGER PRIMARY KEY DEFAULT nextval('seq_trade_id'),
+                user_id INTEGER,
+                timestamp TIMESTAMP DEFAULT current_timestamp,
+                symbol VARCHAR,
+                side VARCHAR,
+                price DOUBLE,
+                amount DOUBLE,
+                type VARCHAR,
+                pnl DOUBLE,
+                strategy VARCHAR,
+                total_value DOUBLE,
+                leverage INTEGER
+            );
+            CREATE SEQUENCE IF NOT EXISTS seq_result_id START 1;
+            CREATE TABLE IF NOT EXISTS backtest_results (
+                id INTEGER PRIMARY KEY DEFAULT nextval('seq_result_id'),
+                strategy VARCHAR,
+                symbol VARCHAR,
+                timeframe VARCHAR,
+                return_pct DOUBLE,
+                win_rate DOUBLE,
+                max_drawdown DOUBLE,
+                sharpe DOUBLE,
+                parameters JSON,
+                created_at TIMESTAMP DEFAULT current_timestamp
+            );
+        """)
+        # Migrations for databases created before these columns existed;
+        # once at connect time, never on the write path.
+        self.conn.execute(
+            "ALTER TABLE trades ADD COLUMN IF NOT EXISTS total_value DOUBLE")
+        self.conn.execute(
+            "ALTER TABLE trades ADD COLUMN IF NOT EXISTS leverage INTEGER")
+        # Pre-default databases carry id columns without the nextval
+        # default; IF NOT EXISTS skips the CREATEs above, so set them
+        # here (idempotent).
+        for table, seq in (('users', 'seq_user_id'),
+                           ('api_keys', 'seq_api_key_id'),
+                           ('trades', 'seq_trade_id'),
+                           ('backtest_results', 'seq_result_id')):
+            self.conn.execute(
+                f"ALTER TABLE {table} ALTER COLUMN id "
+                f"SET DEFAULT nextval('{seq}')")
+        # Top-N pulls (recent trades, leaderboard) order by these
+        # columns; an ART index bounds them instead of a full sort.
+        # DuckDB indexes are direction-agnostic, so no DESC here.
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades(timestamp)")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_backtest_return "
+            "ON backtest_results(return_pct)")
+
+    # --- users ------------------------------------------------------------
+
+    def create_user(self, email: str, password_hash: str) -> int:
+        row = self.conn.execute(
+            _SQL_CREATE_USER, [email, password_hash]).fetchone()
+        self._user_by_email.cache_clear()
+        logger.info("Created user %s with id %s", email, row[0])
+        return row[0]
+
+    def get_user_by_email(self, email: str):
+        return self._user_by_email(email)
+
+    def _fetch_user_by_email(self, email: str):
+        row = self.conn.execute(_SQL_USER_BY_EMAIL, [email]).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row[0], 'email': row[1], 'password_hash': row[2],
+            'telegram_chat_id': row[3], 'subscription_tier': row[4],
+            'subscription_expires_at': row[5],
+        }
+
+    def get_user_by_id(self, user_id: int):
+        row = self.conn.execute(
+            "SELECT id, email, telegram_chat_id, subscription_tier, "
+            "subscription_expires_at FROM users WHERE id = ?",
+            [user_id],
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row[0], 'email': row[1], 'telegram_chat_id': row[2],
+            'subscription_tier': row[3], 'subscription_expires_at': row[4],
+        }
+
+    def is_subscription_active(self, user_id: int) -> bool:
+        row = self.conn.execute(
+            "SELECT subscription_tier, subscription_expires_at "
+            "FROM users WHERE id = ?",
+            [user_id],
+        ).fetchone()
+        if row is None:
+            return False
+        tier, expires_at = row
+        if tier == 'free':
+            return True
+        return expires_at is not None and expires_at > datetime.now()
+
+    def get_bot_bootstrap(self, user_id: int, exchange: str):
+        """Everything the bot needs at startup, in one joined query.
+
+        Replaces the separate ``get_user_by_id`` / ``get_api_key`` /
+        ``get_risk_profile`` round-trips on bot start; the single-purpose
+        methods remain for other callers.
+        """
+        row = self.conn.execute(
+            "SELECT u.id, u.email, u.telegram_chat_id, u.subscription_tier, "
+            "u.subscription_expires_at, k.api_key_encrypted, "
+            "k.api_secret_encrypted, r.risk_profile_json "
+            "FROM users u "
+            "LEFT JOIN api_keys k ON k.user_id = u.id AND k.exchange = ? "
+            "LEFT JOIN risk_profiles r ON r.user_id = u.id "
+            "WHERE u.id = ?",
+            [exchange, user_id],
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row[0], 'email': row[1], 'telegram_chat_id': row[2],
+            'subscription_tier': row[3], 'subscription_expires_at': row[4],
+            'api_key_encrypted': row[5], 'api_secret_encrypted': row[6],
+            'risk_profile_json': row[7],
+        }
+
+    # --- credentials ------------------------------------------------------
+
+    def save_api_key(self, user_id: int, exchange: str,
+                     api_key_encrypted: str, api_secret_encrypted: str):
+        self.conn.execute(
+            "DELETE FROM api_keys WHERE user_id = ? AND exchange = ?",
+            [user_id, exchange],
+        )
+        self.conn.execute(
+            "INSERT INTO api_keys (user_id, exchange, api_key_encrypted, "
+            "api_secret_encrypted) VALUES (?, ?, ?, ?)",
+            [user_id, exchange, api_key_encrypted, api_secret_encrypted],
+        )
+
+    def get_api_key(self, user_id: int, exchange: str):
+        row = self.conn.execute(
+            "SELECT api_key_encrypted, api_secret_encrypted FROM api_keys "
+            "WHERE user_id = ? AND exchange = ?",
+            [user_id, exchange],
+        ).fetchone()
+        if row is None:
+            return None
+        return {'api_key_encrypted': row[0], 'api_secret_encrypted': row[1]}
+
+    def get_risk_profile(self, user_id: int):
+        row = self.conn.execute(
+            "SELECT risk_profile_json FROM risk_profiles WHERE user_id = ?",
+            [user_id],
+        ).fetchone()
+        return row[0] if row else None
+
+    # --- bot state --------------------------------------------------------
+
+    def update_bot_state(self, user_id: int, **fields):
+        """Upsert per-user bot state.
+
+        Timestamp fields (``position_start_time``, ``updated_at``) are stored
+        as unix epoch floats; use :func:`datetime.fromtimestamp` on read if a
+        datetime is needed for display.
+        """
+        current = self.get_bot_state(user_id) or {}
+        current.update(fields)
+        self.conn.execute(
+            _SQL_UPSERT_BOT_STATE,
+            [
+                user_id,
+                current.get('position_side'),
+                current.get('position_size', 0),
+                current.get('entry_price'),
+                current.get('position_start_time'),
+                current.get('active_order_id'),
+                time.time(),
+            ],
+        )
+
+    def get_bot_state(self, user_id: int):
+        row = self.conn.execute(_SQL_GET_BOT_STATE, [user_id]).fetchone()
+        if row is None:
+            return None
+        return {
+            'position_side': row[0], 'position_size': row[1],
+            'entry_price': row[2], 'position_start_time': row[3],
+            'active_order_id': row[4],
+        }
+
+    # --- trades -----------------------------------------------------------
+
+    def save_trade(self, trade_data: dict, user_id: int = None):
+        """Buffer one trade row; rows reach the database on flush."""
+        with self._buffer_lock:
+            self._trade_buffer.append([
+                user_id,
+                trade_data.get('symbol'),
+                trade_data.get('side'),
+                trade_data.get('price'),
+                trade_data.get('amount'),
+                trade_data.get('type'),
+                trade_data.get('pnl'),
+                trade_data.get('strategy'),
+                trade_data.get('total_value'),
+                trade_data.get('leverage'),
+            ])
+            full = len(self._trade_buffer) >= self._FLUSH_ROWS
+        pnl = trade_data.get('pnl')
+        if pnl is not None:
+            self._pnl_total += float(pnl)
+        if full:
+            self.flush()
+        # Per-row message: DEBUG, with %-args so nothing is formatted
+        # unless a handler actually wants the record.
+        logger.debug("Saved trade: %s %s %s @ %s",
+                     trade_data.get('side'), trade_data.get('amount'),
+                     trade_data.get('symbol'), trade_data.get('price'))
+
+    def flush(self):
+        """Write buffered trades and backtest results to the database.
+
+        Called automatically on the row threshold, before reads that
+        must see fresh rows, on close and at interpreter exit.
+        """
+        with self._buffer_lock:
+            if self._trade_buffer:
+                self.conn.executemany(_SQL_INSERT_TRADES, self._trade_buffer)
+                self._trade_buffer.clear()
+            if self._result_buffer:
+                self.conn.executemany(_SQL_INSERT_RESULT,
+                                      self._result_buffer)
+                self._result_buffer.clear()
+
+    def save_trades_batch(self, rows):
+        """Insert many ``(trade_data, user_id)`` pairs in one round-trip."""
+        if not rows:
+            return
+        self.conn.executemany(
+            _SQL_INSERT_TRADES,
+            [
+                [
+                    user_id,
+                    trade_data.get('symbol'),
+                    trade_data.get('side'),
+                    trade_data.get('price'),
+                    trade_data.get('amount'),
+                    trade_data.get('type'),
+                    trade_data.get('pnl'),
+                    trade_data.get('strategy'),
+                    trade_data.get('total_value'),
+                    trade_data.get('leverage'),
+                ]
+                for trade_data, user_id in rows
+            ],
+        )
+        for trade_data, _ in rows:
+            pnl = trade_data.get('pnl')
+            if pnl is not None:
+                self._pnl_total += float(pnl)
+        logger.info("Journalled %d trade(s)", len(rows))
+
+    def get_trades(self, limit: int = 100):
+        self.flush()
+        if 'trades' not in self._tables:
+            return []
+        with self._acquire() as cur:
+            return cur.execute(_SQL_GET_TRADES, [limit]).fetchdf()
+
+    def get_recent_trades(self, limit: int = 20):
+        """Recent trades as plain dicts, skipping the pandas intermediate.
+
+        fetchdf().to_dict('records') would materialize a DataFrame only
+        to tear it straight back down; Arrow converts to Python dicts
+        directly with no consolidation copy.
+        """
+        self.flush()
+        if 'trades' not in self._tables:
+            return []
+        with self._acquire() as cur:
+            return cur.execute(
+                _SQL_GET_TRADES, [limit]).fetch_arrow_table().to_pylist()
+
+    def get_total_pnl(self) -> float:
+        now = time.monotonic()
+        if now - self._pnl_refreshed >= self._PNL_TTL:
+            self.flush()
+            with self._acquire() as cur:
+                row = cur.execute(_SQL_SUM_PNL).fetchone()
+            self._pnl_total = (float(row[0])
+                               if row and row[0] is not None else 0.0)
+            self._pnl_refreshed = now
+        return self._pnl_total
+
+    def clear_trades(self):
+        """Drop and recreate the trades table: clearing is O(metadata)
+        instead of writing a tombstone per row, and disk is reclaimed
+        immediately."""
+        with self._buffer_lock:
+            self._trade_buffer.clear()
+        self._pnl_total = 0.0
+        self._pnl_refreshed = time.monotonic()
+        with self.transaction():
+            self.conn.execute("DROP TABLE IF EXISTS trades")
+            self.create_tables()
+
+    # --- backtest results ---------------------------------------------------
+
+    def save_result(self, result: dict):
+        """Buffer one backtest result row; rows reach the database on flush."""
+        with self._buffer_lock:
+            self._result_buffer.append([
+                result.get('strategy'),
+                result.get('symbol'),
+                result.get('timeframe'),
+                result.get('return_pct'),
+                result.get('win_rate'),
+                result.get('max_drawdown'),
+                result.get('sharpe'),
+                json.dumps(result.get('params') or {}),
+            ])
+            full = len(self._result_buffer) >= self._FLUSH_ROWS
+        if full:
+            self.flush()
+        logger.debug("Saved backtest result for %s on %s",
+                     result.get('strategy'), result.get('symbol'))
+
+    def get_leaderboard(self, limit: int = 50):
+        self.flush()
+        with self._acquire() as cur:
+            tbl = cur.execute(_SQL_LEADERBOARD, [limit]).fetch_arrow_table()
+        # Split blocks keep each column zero-copy where Arrow allows it,
+        # and self_destruct releases the Arrow buffers as they convert
+        # instead of holding both copies alive.
+        return tbl.to_pandas(split_blocks=True, self_destruct=True)
+
+    def clear_leaderboard(self):
+        with self._buffer_lock:
+            self._result_buffer.clear()
+        with self.transaction():
+            self.conn.execute("DROP TABLE IF EXISTS backtest_results")
+            self.create_tables()
+
+    # --- async wrappers -----------------------------------------------------
+    # For event-loop callers: a big SELECT on the loop thread would block
+    # every request, so these offload to worker threads. The cursor pool
+    # above bounds how many run concurrently, so threads queue in
+    # _acquire rather than piling onto one connection's mutex.
+
+    async def aget_trades(self, limit: int = 100):
+        return await asyncio.to_thread(self.get_trades, limit)
+
+    async def aget_recent_trades(self, limit: int = 20):
+        return await asyncio.to_thread(self.get_recent_trades, limit)
+
+    async def aget_leaderboard(self, limit: int = 50):
+        return await asyncio.to_thread(self.get_leaderboard, limit)
+
+    async def aget_total_pnl(self) -> float:
+        # Usually just the cached total, but a stale TTL triggers a
+        # flush plus a SUM(pnl) — blocking work that belongs off the
+        # loop like the other reads.
+        return await asyncio.to_thread(self.get_total_pnl)
+
+    def close(self):
+        self.flush()
+        while not self._cursor_pool.empty():
+            self._cursor_pool.get_nowait().close()
+        self.conn.close()
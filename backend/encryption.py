@@ -0,0 +1,24 @@
+"""AES-256 (Fernet) helper for encrypting exchange API credentials at rest."""
+
+import os
+
+from cryptography.fernet import Fernet
+
+
+class EncryptionHelper:
+    """Symmetric encryption for API keys stored in the database."""
+
+    def __init__(self, key: str = None):
+        key = key or os.getenv('ENCRYPTION_KEY')
+        if not key:
+            raise ValueError(
+                'ENCRYPTION_KEY is not set. Run generate_encryption_key.py '
+                'and add the result to your .env file.'
+            )
+        self._fernet = Fernet(key.encode() if isinstance(key, str) else key)
+
+    def encrypt(self, plaintext: str) -> str:
+        return self._fernet.encrypt(plaintext.encode()).decode()
+
+    def decrypt(self, token: str) -> str:
+        return self._fernet.decrypt(token.encode()).decode()
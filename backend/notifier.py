@@ -0,0 +1,112 @@
+"""Telegram notifications for trade events and errors."""
+
+import logging
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import config
+
+logger = logging.getLogger('TradingBot.Notifier')
+
+
+# Telegram caps messages at 4096 chars; leave headroom for separators.
+_BATCH_CHARS = 3500
+_BATCH_WINDOW = 0.1
+
+# One drain thread (and its session) per (token, chat_id). Notifier
+# instances are built per bot start, so sharing the worker keeps
+# restarts from leaking a thread and connection pool each time.
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def _worker_queue(token, chat_id):
+    key = (token, chat_id)
+    q = _workers.get(key)
+    if q is None:
+        with _workers_lock:
+            q = _workers.get(key)
+            if q is None:
+                q = queue.SimpleQueue()
+                threading.Thread(target=_drain, args=(q, token, chat_id),
+                                 daemon=True,
+                                 name='telegram-notifier').start()
+                _workers[key] = q
+    return q
+
+
+def _drain(q, token, chat_id):
+    session = requests.Session()
+    session.mount('https://',
+                  HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    url = f"https://api.telegram.org/bot{token}/sendMessage"
+    while True:
+        parts = [q.get()]
+        size = len(parts[0])
+        # Coalesce a burst of alerts into one API call: wait briefly
+        # for stragglers and pack until near the message size cap.
+        deadline = time.monotonic() + _BATCH_WINDOW
+        while size < _BATCH_CHARS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                text = q.get(timeout=remaining)
+            except queue.Empty:
+                break
+            parts.append(text)
+            size += len(text)
+        try:
+            session.post(
+                url,
+                json={'chat_id': chat_id,
+                      'text': '\n\n'.join(parts),
+                      'parse_mode': 'HTML'},
+                timeout=10,
+            )
+        except requests.RequestException as e:
+            logger.warning(f"Telegram send failed: {e}")
+
+
+class TelegramNotifier:
+    """Sends messages to a user's Telegram chat via the Bot API.
+
+    Messages are queued and posted from a background daemon thread over a
+    keep-alive session, so callers on the trading loop only pay for a
+    queue put instead of a blocking HTTPS round-trip. The thread is
+    shared across instances with the same token and chat.
+    """
+
+    def __init__(self, token: str = None, chat_id: str = None):
+        self.token = token or config.TELEGRAM_BOT_TOKEN
+        self.chat_id = chat_id or config.TELEGRAM_CHAT_ID
+        self.enabled = bool(self.token and self.chat_id)
+        if self.enabled:
+            self._queue = _worker_queue(self.token, self.chat_id)
+
+    def send_message(self, text: str):
+        if not self.enabled:
+            return
+        self._queue.put(text)
+
+    def send_trade_alert(self, trade_data: dict):
+        side = trade_data.get('side', '?')
+        emoji = '\U0001F7E2' if side == 'Buy' else '\U0001F534'
+        text = (
+            f"{emoji} <b>{trade_data.get('type', 'TRADE')}</b>\n"
+            f"Symbol: {trade_data.get('symbol')}\n"
+            f"Side: {side}\n"
+            f"Price: {trade_data.get('price')}\n"
+            f"Amount: {trade_data.get('amount')}"
+        )
+        pnl = trade_data.get('pnl')
+        if pnl is not None:
+            text += f"\nPnL: {pnl:+.2f} USDT"
+        self.send_message(text)
+
+    def send_error(self, error: str):
+        self.send_message(f"⚠️ <b>Bot error</b>\n{error}")
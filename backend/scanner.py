@@ -0,0 +1,45 @@
+"""Market scanner: scores a symbol's short-term setup quality (0-3).
+
+The score feeds ``config.POSITION_SIZES`` so stronger setups get larger
+position sizing.
+"""
+
+import logging
+
+from . import config
+
+logger = logging.getLogger('TradingBot.Scanner')
+
+
+class Scanner:
+
+    def __init__(self, client):
+        self.client = client
+
+    def score_symbol(self, symbol: str, timeframe: str = '15m') -> int:
+        """Score momentum, volume and volatility; one point each."""
+        try:
+            ohlcv = self.client.fetch_ohlcv(symbol, timeframe, limit=50)
+        except Exception as e:
+            logger.warning(f"Scanner fetch failed for {symbol}: {e}")
+            return 0
+        if len(ohlcv) < 30:
+            return 0
+        closes = [row[4] for row in ohlcv]
+        volumes = [row[5] for row in ohlcv]
+        score = 0
+        # Momentum: last close above the close 20 bars ago.
+        if closes[-1] > closes[-21]:
+            score += 1
+        # Volume: latest volume above the recent average.
+        avg_vol = sum(volumes[-20:]) / 20
+        if volumes[-1] > avg_vol:
+            score += 1
+        # Volatility: recent range wide enough to cover fees.
+        recent = closes[-20:]
+        if (max(recent) - min(recent)) / closes[-1] > 2 * config.TAKER_FEE_PCT:
+            score += 1
+        return score
+
+    def position_multiplier(self, symbol: str) -> float:
+        return config.POSITION_SIZES_ARR[self.score_symbol(symbol)]
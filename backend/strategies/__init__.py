@@ -0,0 +1 @@
+# Strategy implementations for the trading engine.
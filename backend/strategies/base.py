@@ -0,0 +1,32 @@
+"""Base class shared by all trading strategies."""
+
+
+class Strategy:
+    """A strategy turns a window of OHLCV data into a BUY/SELL/HOLD signal."""
+
+    __slots__ = ('params', '__dict__')
+
+    name = 'base'
+
+    def __init__(self, **params):
+        self.params = params
+
+    def generate_signal(self, df) -> str:
+        """Return 'BUY', 'SELL' or 'HOLD' for the given OHLCV DataFrame.
+
+        Recomputes indicators over the whole window; the backtester uses
+        this. The live loop prefers :meth:`push`, which advances O(1)
+        incremental state with each closed bar instead.
+        """
+        raise NotImplementedError
+
+    def push(self, close: float) -> str:
+        """Advance indicator state with one closed-bar close; return a signal."""
+        raise NotImplementedError
+
+    def warmup(self, closes) -> str:
+        """Seed incremental state from historical closes (oldest first)."""
+        signal = 'HOLD'
+        for close in closes:
+            signal = self.push(float(close))
+        return signal
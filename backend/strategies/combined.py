@@ -0,0 +1,29 @@
+"""Combined strategy: RSI and MACD must agree before a signal fires."""
+
+from .base import Strategy
+from .macd_strategy import MACDStrategy
+from .rsi_strategy import RSIStrategy
+
+
+class CombinedStrategy(Strategy):
+
+    name = 'combined'
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.rsi = RSIStrategy(**params)
+        self.macd = MACDStrategy(**params)
+
+    def generate_signal(self, df) -> str:
+        rsi_signal = self.rsi.generate_signal(df)
+        macd_signal = self.macd.generate_signal(df)
+        if rsi_signal == macd_signal and rsi_signal != 'HOLD':
+            return rsi_signal
+        return 'HOLD'
+
+    def push(self, close: float) -> str:
+        rsi_signal = self.rsi.push(close)
+        macd_signal = self.macd.push(close)
+        if rsi_signal == macd_signal and rsi_signal != 'HOLD':
+            return rsi_signal
+        return 'HOLD'
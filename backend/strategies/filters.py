@@ -0,0 +1,36 @@
+"""Higher-timeframe filters applied on top of the base strategy signal."""
+
+
+class TrendFilter:
+    """Classifies the higher-timeframe trend using an EMA-200 baseline.
+
+    The EMA is bootstrapped with one full ``ewm`` pass on the first call
+    and then advanced incrementally — a single multiply-add per newly
+    closed HTF bar — instead of recomputing the whole series each time.
+    """
+
+    def __init__(self, span: int = 200):
+        self.span = span
+        self._alpha = 2.0 / (span + 1)
+        self._ema = None
+        self._last_closed_ts = 0
+
+    def check_trend(self, df_htf):
+        """Return ``(trend, price_high, ema_200)`` for the HTF window.
+
+        ``trend`` is 'UP' when the latest close is above the EMA-200,
+        'DOWN' when below.
+        """
+        closes = df_htf['close']
+        latest_ts = int(df_htf['timestamp'].iloc[-1])
+        if self._ema is None:
+            self._ema = closes.ewm(span=self.span,
+                                   adjust=False).mean().iloc[-1]
+            self._last_closed_ts = latest_ts
+        elif latest_ts > self._last_closed_ts:
+            self._ema = (self._alpha * closes.iloc[-1]
+                         + (1.0 - self._alpha) * self._ema)
+            self._last_closed_ts = latest_ts
+        price_high = df_htf['high'].iloc[-1]
+        trend = 'UP' if closes.iloc[-1] >= self._ema else 'DOWN'
+        return trend, price_high, self._ema
@@ -0,0 +1,63 @@
+"""MACD strategy: signal-line crossovers."""
+
+from .base import Strategy
+
+
+class MACDStrategy(Strategy):
+
+    name = 'macd'
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9,
+                 **params):
+        super().__init__(**params)
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        self._alpha_fast = 2.0 / (fast + 1)
+        self._alpha_slow = 2.0 / (slow + 1)
+        self._alpha_sig = 2.0 / (signal + 1)
+        self._ema_fast = None
+        self._ema_slow = None
+        self._ema_sig = None
+        self._prev_macd = None
+        self._prev_sig = None
+        self._bars = 0
+
+    def generate_signal(self, df) -> str:
+        if len(df) < self.slow + self.signal:
+            return 'HOLD'
+        closes = df['close']
+        macd = (closes.ewm(span=self.fast, adjust=False).mean()
+                - closes.ewm(span=self.slow, adjust=False).mean())
+        sig = macd.ewm(span=self.signal, adjust=False).mean()
+        if macd.iloc[-2] <= sig.iloc[-2] and macd.iloc[-1] > sig.iloc[-1]:
+            return 'BUY'
+        if macd.iloc[-2] >= sig.iloc[-2] and macd.iloc[-1] < sig.iloc[-1]:
+            return 'SELL'
+        return 'HOLD'
+
+    def push(self, close: float) -> str:
+        # EMA recurrences seeded with the first observation, identical to
+        # ewm(span=..., adjust=False).
+        if self._ema_fast is None:
+            self._ema_fast = close
+            self._ema_slow = close
+        else:
+            self._ema_fast += self._alpha_fast * (close - self._ema_fast)
+            self._ema_slow += self._alpha_slow * (close - self._ema_slow)
+        macd = self._ema_fast - self._ema_slow
+        if self._ema_sig is None:
+            self._ema_sig = macd
+        else:
+            self._ema_sig += self._alpha_sig * (macd - self._ema_sig)
+        sig = self._ema_sig
+        prev_macd, prev_sig = self._prev_macd, self._prev_sig
+        self._prev_macd, self._prev_sig = macd, sig
+        self._bars += 1
+        if self._bars < self.slow + self.signal or prev_macd is None:
+            return 'HOLD'
+        if prev_macd <= prev_sig and macd > sig:
+            return 'BUY'
+        if prev_macd >= prev_sig and macd < sig:
+            return 'SELL'
+        return 'HOLD'
@@ -0,0 +1,59 @@
+"""Mean-reversion strategy: trade z-score extremes against a rolling mean."""
+
+import math
+from collections import deque
+
+from .base import Strategy
+
+
+class MeanReversion(Strategy):
+
+    name = 'mean_reversion'
+
+    def __init__(self, window: int = 20, entry_z: float = 2.0, **params):
+        super().__init__(**params)
+        self.window = window
+        self.entry_z = entry_z
+        self._buf = deque(maxlen=window)
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    def generate_signal(self, df) -> str:
+        if len(df) < self.window:
+            return 'HOLD'
+        closes = df['close']
+        mean = closes.rolling(self.window).mean().iloc[-1]
+        std = closes.rolling(self.window).std().iloc[-1]
+        if not std:
+            return 'HOLD'
+        z = (closes.iloc[-1] - mean) / std
+        if z < -self.entry_z:
+            return 'BUY'
+        if z > self.entry_z:
+            return 'SELL'
+        return 'HOLD'
+
+    def push(self, close: float) -> str:
+        buf = self._buf
+        if len(buf) == self.window:
+            old = buf[0]
+            self._sum -= old
+            self._sumsq -= old * old
+        buf.append(close)
+        self._sum += close
+        self._sumsq += close * close
+        n = len(buf)
+        if n < self.window:
+            return 'HOLD'
+        mean = self._sum / n
+        # Sample variance (ddof=1), matching pandas rolling().std().
+        var = max(0.0, (self._sumsq - n * mean * mean) / (n - 1))
+        std = math.sqrt(var)
+        if not std:
+            return 'HOLD'
+        z = (close - mean) / std
+        if z < -self.entry_z:
+            return 'BUY'
+        if z > self.entry_z:
+            return 'SELL'
+        return 'HOLD'
@@ -0,0 +1,64 @@
+"""RSI strategy: buy oversold, sell overbought."""
+
+from .base import Strategy
+
+
+class RSIStrategy(Strategy):
+
+    name = 'rsi'
+
+    def __init__(self, period: int = 14, oversold: float = 30.0,
+                 overbought: float = 70.0, **params):
+        super().__init__(**params)
+        self.period = period
+        self.oversold = oversold
+        self.overbought = overbought
+        self._prev_close = None
+        self._avg_gain = None
+        self._avg_loss = None
+        self._deltas = 0
+
+    def generate_signal(self, df) -> str:
+        if len(df) < self.period + 1:
+            return 'HOLD'
+        delta = df['close'].diff()
+        gain = delta.clip(lower=0).ewm(alpha=1 / self.period,
+                                       adjust=False).mean()
+        loss = (-delta.clip(upper=0)).ewm(alpha=1 / self.period,
+                                          adjust=False).mean()
+        last_loss = loss.iloc[-1]
+        if last_loss == 0:
+            return 'HOLD'
+        rsi = 100 - 100 / (1 + gain.iloc[-1] / last_loss)
+        if rsi < self.oversold:
+            return 'BUY'
+        if rsi > self.overbought:
+            return 'SELL'
+        return 'HOLD'
+
+    def push(self, close: float) -> str:
+        prev = self._prev_close
+        self._prev_close = close
+        if prev is None:
+            return 'HOLD'
+        delta = close - prev
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        # Wilder smoothing: identical to ewm(alpha=1/period, adjust=False)
+        # seeded with the first delta.
+        if self._avg_gain is None:
+            self._avg_gain = gain
+            self._avg_loss = loss
+        else:
+            alpha = 1.0 / self.period
+            self._avg_gain += alpha * (gain - self._avg_gain)
+            self._avg_loss += alpha * (loss - self._avg_loss)
+        self._deltas += 1
+        if self._deltas < self.period or self._avg_loss == 0:
+            return 'HOLD'
+        rsi = 100 - 100 / (1 + self._avg_gain / self._avg_loss)
+        if rsi < self.oversold:
+            return 'BUY'
+        if rsi > self.overbought:
+            return 'SELL'
+        return 'HOLD'
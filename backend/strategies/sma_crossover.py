@@ -0,0 +1,56 @@
+"""SMA crossover strategy: fast average crossing the slow average."""
+
+from collections import deque
+
+from .base import Strategy
+
+
+class SMACrossover(Strategy):
+
+    name = 'sma_crossover'
+
+    def __init__(self, fast: int = 10, slow: int = 30, **params):
+        super().__init__(**params)
+        self.fast = fast
+        self.slow = slow
+        self._fast_buf = deque(maxlen=fast)
+        self._slow_buf = deque(maxlen=slow)
+        self._fast_sum = 0.0
+        self._slow_sum = 0.0
+        self._prev_fast = None
+        self._prev_slow = None
+
+    def generate_signal(self, df) -> str:
+        if len(df) < self.slow + 1:
+            return 'HOLD'
+        closes = df['close']
+        fast = closes.rolling(self.fast).mean()
+        slow = closes.rolling(self.slow).mean()
+        if fast.iloc[-2] <= slow.iloc[-2] and fast.iloc[-1] > slow.iloc[-1]:
+            return 'BUY'
+        if fast.iloc[-2] >= slow.iloc[-2] and fast.iloc[-1] < slow.iloc[-1]:
+            return 'SELL'
+        return 'HOLD'
+
+    def push(self, close: float) -> str:
+        if len(self._fast_buf) == self.fast:
+            self._fast_sum -= self._fast_buf[0]
+        self._fast_buf.append(close)
+        self._fast_sum += close
+        if len(self._slow_buf) == self.slow:
+            self._slow_sum -= self._slow_buf[0]
+        self._slow_buf.append(close)
+        self._slow_sum += close
+        if len(self._slow_buf) < self.slow:
+            return 'HOLD'
+        fast = self._fast_sum / self.fast
+        slow = self._slow_sum / self.slow
+        prev_fast, prev_slow = self._prev_fast, self._prev_slow
+        self._prev_fast, self._prev_slow = fast, slow
+        if prev_fast is None:
+            return 'HOLD'
+        if prev_fast <= prev_slow and fast > slow:
+            return 'BUY'
+        if prev_fast >= prev_slow and fast < slow:
+            return 'SELL'
+        return 'HOLD'